@@ -1,12 +1,122 @@
+import json
+import uuid
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.functional import cached_property
+from django.utils.translation import ugettext_lazy as _
+
+from .models import ChunkedUpload, ChunkedUploadStatistics
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that doesn't `COUNT(*)` large tables. Unfiltered pages use the
+    table size estimated by PostgreSQL. Filtered results are counted up to
+    `min_estimate` rows; beyond that, PostgreSQL's estimate of the query is
+    used, and other databases report `min_estimate + 1` results.
+    """
+
+    # Below this estimate, the table is small enough to be counted
+    min_estimate = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        postgresql = connection.vendor == "postgresql"
+
+        if not queryset.query.where:
+            estimate = self.get_table_estimate(queryset) if postgresql else None
+            if estimate is not None and estimate >= self.min_estimate:
+                return estimate
+            return super(EstimatedCountPaginator, self).count
 
-from .models import ChunkedUpload
+        count = queryset[:self.min_estimate + 1].count()
+        if count <= self.min_estimate or not postgresql:
+            return count
+        return max(count, self.get_query_estimate(queryset))
+
+    def get_table_estimate(self, queryset):
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return None if row is None else int(row[0])
+
+    def get_query_estimate(self, queryset):
+        connection = connections[queryset.db]
+        sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        # psycopg2 decodes the JSON
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class ChunkedUploadAdmin(admin.ModelAdmin):
     list_display = ("id", "filename", "user", "status", "created_at")
-    search_fields = ("filename",)
+    # Searched by `get_search_results`, shows the search box
+    search_fields = ("id", "filename")
     list_filter = ("status",)
+    list_select_related = ("user",)
+    ordering = ("-created_at",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/drf_chunked_upload/chunkedupload/change_list.html"
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search by id, or by the start of the filename (case sensitive on
+        PostgreSQL), so that the search can use the indexes instead of
+        scanning the table.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+
+        try:
+            return queryset.filter(pk=uuid.UUID(search_term)), False
+        except ValueError:
+            return queryset.filter(filename__startswith=search_term), False
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        urls = [
+            path(
+                "statistics/",
+                self.admin_site.admin_view(self.statistics_view),
+                name="%s_%s_statistics" % info,
+            ),
+        ]
+        return urls + super(ChunkedUploadAdmin, self).get_urls()
+
+    def statistics_view(self, request):
+        """
+        Dashboard with the current state of uploads and the recent periods of
+        `ChunkedUploadStatistics`.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title=_("Upload statistics"),
+            summary=ChunkedUploadStatistics.objects.summary(),
+            periods=ChunkedUploadStatistics.objects.by_period()[:24],
+        )
+        return TemplateResponse(
+            request, "admin/drf_chunked_upload/statistics.html", context
+        )
 
 
 admin.site.register(ChunkedUpload, ChunkedUploadAdmin)
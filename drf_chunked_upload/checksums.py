@@ -0,0 +1,220 @@
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+
+try:
+    import crc32c
+except ImportError:
+    crc32c = None
+
+# Hash the whole file as a single stream
+LINEAR = "linear"
+# Hash fixed size blocks independently, then hash the concatenation of
+# their digests
+TREE = "tree"
+
+MODES = (LINEAR, TREE)
+
+DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024
+
+THREAD = "thread"
+PROCESS = "process"
+
+EXECUTORS = (THREAD, PROCESS)
+
+
+class CRC32(object):
+    """
+    hashlib-like wrapper of `zlib.crc32`.
+    """
+
+    name = "crc32"
+    digest_size = 4
+
+    def __init__(self):
+        self.value = 0
+
+    def _crc(self, data, value):
+        return zlib.crc32(data, value)
+
+    def update(self, data):
+        self.value = self._crc(data, self.value)
+
+    def digest(self):
+        return struct.pack(">I", self.value)
+
+    def hexdigest(self):
+        return "%08x" % self.value
+
+
+class CRC32C(CRC32):
+    """
+    hashlib-like wrapper of CRC-32C (Castagnoli), provided by the `crc32c`
+    package.
+    """
+
+    name = "crc32c"
+
+    def __init__(self):
+        if crc32c is None:
+            raise ValueError("crc32c checksums require the crc32c package")
+        super(CRC32C, self).__init__()
+
+    def _crc(self, data, value):
+        return crc32c.crc32c(data, value)
+
+
+# Checksum types that are not provided by hashlib
+HASHES = {
+    CRC32.name: CRC32,
+    CRC32C.name: CRC32C,
+}
+
+
+def new_hash(checksum_type):
+    """
+    Create a hash object for `checksum_type`, any hashlib algorithm or one
+    of `HASHES`.
+    """
+    if checksum_type in HASHES:
+        return HASHES[checksum_type]()
+    return hashlib.new(checksum_type)
+
+
+def combine_digests(checksum_type, digests):
+    h = new_hash(checksum_type)
+    h.update(b"".join(digests))
+    return h.hexdigest()
+
+
+class TreeHash(object):
+    """
+    Streaming version of the `TREE` checksum mode, giving the same result as
+    hashing the blocks in parallel.
+    """
+
+    def __init__(self, checksum_type, block_size=DEFAULT_BLOCK_SIZE):
+        self.checksum_type = checksum_type
+        self.block_size = block_size
+        self.digests = []
+        self._new_block()
+
+    def _new_block(self):
+        self.block = new_hash(self.checksum_type)
+        self.block_offset = 0
+
+    def update(self, data):
+        with memoryview(data) as view:
+            start = 0
+            while start < len(view):
+                end = min(len(view), start + self.block_size - self.block_offset)
+                self.block.update(view[start:end])
+                self.block_offset += end - start
+                start = end
+
+                if self.block_offset == self.block_size:
+                    self.digests.append(self.block.digest())
+                    self._new_block()
+
+    def hexdigest(self):
+        digests = list(self.digests)
+        if self.block_offset:
+            digests.append(self.block.digest())
+        return combine_digests(self.checksum_type, digests)
+
+
+def new_hasher(checksum_type, mode=LINEAR, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Create a streaming hash object for `checksum_type` in the given mode.
+    """
+    if mode == LINEAR:
+        return new_hash(checksum_type)
+    if mode == TREE:
+        return TreeHash(checksum_type, block_size=block_size)
+    raise ValueError("Invalid checksum mode: '%s'" % mode)
+
+
+def hash_chunks(chunks, checksum_type, mode=LINEAR, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Checksum of an iterable of chunks, e.g. `File.chunks()`.
+    """
+    h = new_hasher(checksum_type, mode=mode, block_size=block_size)
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def _hash_block(buffer, offset, block_size, checksum_type):
+    h = new_hash(checksum_type)
+    with buffer[offset:offset + block_size] as block:
+        h.update(block)
+    return h.digest()
+
+
+def _hash_file_block(path, offset, block_size, checksum_type):
+    # Runs in a worker process, which maps the file on its own
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as buffer:
+                return _hash_block(buffer, offset, block_size, checksum_type)
+
+
+def hash_file(
+    path,
+    checksum_type,
+    mode=LINEAR,
+    block_size=DEFAULT_BLOCK_SIZE,
+    workers=None,
+    executor=THREAD,
+):
+    """
+    Checksum of the file at `path`, memory mapped instead of read in chunks.
+
+    In `TREE` mode, blocks are hashed in parallel by `workers` threads or
+    processes, depending on `executor`. hashlib releases the GIL while
+    hashing, so threads are usually enough.
+    """
+    if mode not in MODES:
+        raise ValueError("Invalid checksum mode: '%s'" % mode)
+    if executor not in EXECUTORS:
+        raise ValueError("Invalid checksum executor: '%s'" % executor)
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        # Empty files can't be memory mapped
+        if not size:
+            return new_hasher(checksum_type, mode, block_size).hexdigest()
+
+        offsets = range(0, size, block_size)
+
+        if mode == TREE and executor == PROCESS and len(offsets) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                digests = pool.map(
+                    _hash_file_block,
+                    repeat(path),
+                    offsets,
+                    repeat(block_size),
+                    repeat(checksum_type),
+                )
+                return combine_digests(checksum_type, list(digests))
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as buffer:
+                if mode == LINEAR:
+                    h = new_hash(checksum_type)
+                    h.update(buffer)
+                    return h.hexdigest()
+
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    digests = pool.map(
+                        _hash_block,
+                        repeat(buffer),
+                        offsets,
+                        repeat(block_size),
+                        repeat(checksum_type),
+                    )
+                    return combine_digests(checksum_type, list(digests))
@@ -0,0 +1,230 @@
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from . import checksums
+from .exceptions import ChunkedUploadError
+
+# Size (in bytes) of each chunk sent to the server
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Seconds to wait for the connection to be established, and then for each
+# response, as accepted by `requests`
+DEFAULT_TIMEOUT = (10, 120)
+
+
+class StreamingChecksum(object):
+    """
+    Checksum of the first `offset` bytes of a buffer, advanced as the server
+    acknowledges chunks so the file never has to be read twice.
+    """
+
+    def __init__(
+        self,
+        buffer,
+        checksum_type,
+        mode=checksums.LINEAR,
+        block_size=checksums.DEFAULT_BLOCK_SIZE,
+    ):
+        self.buffer = buffer
+        self.checksum_type = checksum_type
+        self.mode = mode
+        self.block_size = block_size
+        self.reset()
+
+    def reset(self):
+        self.hasher = checksums.new_hasher(
+            self.checksum_type, mode=self.mode, block_size=self.block_size
+        )
+        self.offset = 0
+
+    def advance(self, offset):
+        # The server went backwards (e.g. a chunk was lost), start over
+        if offset < self.offset:
+            self.reset()
+
+        with self.buffer[self.offset:offset] as data:
+            self.hasher.update(data)
+        self.offset = offset
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+class ChunkedUploadClient(object):
+    """
+    Uploads local files to a `ChunkedUploadView` in multiple chunks.
+
+    Files are memory mapped and sent straight from the mapping, the checksum
+    is computed as chunks are acknowledged and, if a request fails, the upload
+    is resumed from the offset reported by the server.
+
+    `upload_many` uploads several files at once over a pool of connections.
+    Chunks of a single file are always sent in order, since the server only
+    accepts a chunk starting at the current offset of the upload.
+    """
+
+    content_range_header = "Content-Range"
+    content_range_format = "bytes {start}-{end}/{total}"
+
+    def __init__(
+        self,
+        url,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        checksum_type="md5",
+        checksum_mode=checksums.LINEAR,
+        checksum_block_size=checksums.DEFAULT_BLOCK_SIZE,
+        field_name="file",
+        max_workers=4,
+        max_retries=3,
+        timeout=DEFAULT_TIMEOUT,
+        auth=None,
+        headers=None,
+    ):
+        self.url = url
+        self.chunk_size = chunk_size
+        self.checksum_type = checksum_type
+        self.checksum_mode = checksum_mode
+        self.checksum_block_size = checksum_block_size
+        self.field_name = field_name
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.auth = auth
+        self.headers = headers or {}
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """
+        `requests.Session` of the current thread. Sessions are not shared
+        between threads, each one keeps its own connection pool.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.auth = self.auth
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request and return the decoded response data. Error responses
+        are raised as `ChunkedUploadError`.
+        """
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {"detail": response.text}
+        if not isinstance(data, dict):
+            data = {"detail": data}
+
+        if response.status_code >= 400:
+            raise ChunkedUploadError(status=response.status_code, **data)
+        return data
+
+    def get_offset(self, upload_url):
+        """
+        Get the amount of data the server has already received for an upload.
+        """
+        return self.request("get", upload_url)["offset"]
+
+    def put_chunk(self, upload_url, filename, chunk, start, total):
+        """
+        Send a chunk starting at `start`. Without an `upload_url`, a new upload
+        is created.
+        """
+        content_range = self.content_range_format.format(
+            start=start, end=start + len(chunk) - 1, total=total
+        )
+        return self.request(
+            "put",
+            upload_url or self.url,
+            data={"filename": filename},
+            files={self.field_name: (filename, chunk)},
+            headers={self.content_range_header: content_range},
+        )
+
+    def complete(self, upload_url, checksum):
+        return self.request("post", upload_url, data={self.checksum_type: checksum})
+
+    def upload(self, path, filename=None, upload_url=None):
+        """
+        Upload the file at `path` and return the data of the completed upload.
+        Pass the `url` of an interrupted upload as `upload_url` to resume it.
+        """
+        filename = filename or os.path.basename(path)
+
+        with open(path, "rb") as f:
+            total = os.fstat(f.fileno()).st_size
+            if not total:
+                raise ValueError("Can't upload empty file %s" % path)
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as buffer:
+                    return self._upload(buffer, filename, total, upload_url)
+
+    def _upload(self, buffer, filename, total, upload_url):
+        checksum = StreamingChecksum(
+            buffer,
+            self.checksum_type,
+            mode=self.checksum_mode,
+            block_size=self.checksum_block_size,
+        )
+        offset = self.get_offset(upload_url) if upload_url else 0
+        retries = 0
+
+        while offset < total:
+            end = min(offset + self.chunk_size, total)
+            try:
+                with buffer[offset:end] as chunk:
+                    data = self.put_chunk(upload_url, filename, chunk, offset, total)
+            except (requests.ConnectionError, requests.Timeout, ChunkedUploadError) as error:
+                retries += 1
+                if retries > self.max_retries or not self._is_resumable(
+                    error, upload_url
+                ):
+                    raise
+                offset = self._resume_offset(upload_url, error)
+                continue
+
+            retries = 0
+            upload_url = data["url"]
+            offset = data["offset"]
+            checksum.advance(offset)
+
+        checksum.advance(total)
+        return self.complete(upload_url, checksum.hexdigest())
+
+    def _is_resumable(self, error, upload_url):
+        if not upload_url:
+            # The server may have created the upload before the request
+            # failed, retrying would leave it orphaned. Only retry if the
+            # connection was never established
+            return isinstance(error, requests.ConnectTimeout)
+        if not isinstance(error, ChunkedUploadError):
+            return True
+        # Server errors may be transient, offset mismatches tell us where to
+        # continue from
+        return error.status_code >= 500 or "offset" in error.data
+
+    def _resume_offset(self, upload_url, error):
+        if isinstance(error, ChunkedUploadError) and "offset" in error.data:
+            return error.data["offset"]
+        if upload_url:
+            return self.get_offset(upload_url)
+        return 0
+
+    def upload_many(self, paths):
+        """
+        Upload several files in parallel, one per connection of the pool, and
+        return the data of the completed uploads in the same order as `paths`.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.upload, paths))
@@ -0,0 +1,190 @@
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.core.cache import caches
+
+
+def upload_channel(upload_id):
+    """
+    Channel of the events of a single upload.
+    """
+    return "upload:%s" % upload_id
+
+
+def user_channel(user_id):
+    """
+    Channel of the events of all the uploads of a user.
+    """
+    return "user:%s" % user_id
+
+
+class BaseEventBackend(object):
+    """
+    Publish/subscribe backend for upload events. Events are dictionaries that
+    can be serialized to JSON.
+    """
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """
+        Return a subscription to the events published to `channel` from now
+        on. Its `get(timeout)` method returns the next event, or `None` if
+        none was published within `timeout` seconds, and `close()` ends it.
+        """
+        raise NotImplementedError
+
+
+class InProcessSubscription(object):
+    def __init__(self, backend, channel):
+        self.backend = backend
+        self.channel = channel
+        self.events = queue.Queue()
+
+    def get(self, timeout=None):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class InProcessEventBackend(BaseEventBackend):
+    """
+    Delivers events to the subscribers of the current process only. Use
+    `CacheEventBackend` when uploads are handled by several processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.events.put(event)
+
+    def subscribe(self, channel):
+        subscription = InProcessSubscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.channel, None)
+
+
+class CacheSubscription(object):
+    def __init__(self, backend, channel):
+        self.backend = backend
+        self.channel = channel
+        self.sequence = backend.get_sequence(channel)
+        self.waiting_for = None
+        self.events = deque()
+
+    def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while not self.events:
+            last = self.backend.get_sequence(self.channel)
+            # The counter expired and started over
+            if last < self.sequence:
+                self.sequence = 0
+
+            if last > self.sequence:
+                self._fetch(last)
+                if self.events:
+                    break
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.backend.poll_interval)
+
+        return self.events.popleft()
+
+    def _fetch(self, last):
+        first = max(self.sequence + 1, last - self.backend.max_backlog + 1)
+        events = self.backend.get_events(self.channel, first, last)
+
+        for sequence in range(first, last + 1):
+            if sequence in events:
+                self.events.append(events[sequence])
+            elif self.waiting_for != sequence:
+                # The event is numbered before it is stored, give it until
+                # the next poll
+                self.waiting_for = sequence
+                return
+            self.sequence = sequence
+
+    def close(self):
+        pass
+
+
+class CacheEventBackend(BaseEventBackend):
+    """
+    Delivers events through a Django cache shared by all processes, e.g.
+    Redis or Memcached. Each event is stored under a key numbered by a
+    per-channel counter, which subscribers poll every `poll_interval`
+    seconds. Events that expire (after `timeout` seconds) before a
+    subscriber gets them are skipped.
+    """
+
+    key_prefix = "drf_chunked_upload:events"
+
+    # Max amount of events a subscriber catches up with at once
+    max_backlog = 100
+
+    def __init__(self, alias="default", timeout=300, poll_interval=0.5):
+        self.alias = alias
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_key(self, channel, sequence=None):
+        key = "%s:%s" % (self.key_prefix, channel)
+        if sequence is not None:
+            key = "%s:%s" % (key, sequence)
+        return key
+
+    def get_sequence(self, channel):
+        return self.cache.get(self.get_key(channel), 0)
+
+    def get_events(self, channel, first, last):
+        """
+        Events numbered from `first` to `last` that are still in the cache,
+        by number.
+        """
+        keys = {
+            self.get_key(channel, sequence): sequence
+            for sequence in range(first, last + 1)
+        }
+        events = self.cache.get_many(list(keys))
+        return {keys[key]: event for key, event in events.items()}
+
+    def publish(self, channel, event):
+        key = self.get_key(channel)
+        self.cache.add(key, 0, self.timeout)
+        try:
+            sequence = self.cache.incr(key)
+        except ValueError:
+            # The counter expired since it was added
+            sequence = 1
+            self.cache.set(key, sequence, self.timeout)
+        self.cache.touch(key, self.timeout)
+        self.cache.set(self.get_key(channel, sequence), event, self.timeout)
+
+    def subscribe(self, channel):
+        return CacheSubscription(self, channel)
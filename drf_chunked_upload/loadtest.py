@@ -0,0 +1,478 @@
+"""
+Load test of `ChunkedUploadView` with many concurrent resumable uploads.
+
+Starts the app on a local server (in its own process, with a SQLite
+database by default), then runs concurrent clients that create, append to,
+resume and complete uploads, and reports latency per phase, throughput and
+the peak memory of the server.
+
+    python -m drf_chunked_upload.loadtest --uploads 500 --concurrency 200
+
+With `--settings`, the server uses the database and storage of that
+settings module: uploads are written to them, and deleted at the end
+unless `--keep-uploads` is given. Its migrations are only run with
+`--migrate`, and its ROOT_URLCONF is replaced by the one of the harness.
+
+Requires `requests` (the `client` extra).
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+CREATE = "create"
+APPEND = "append"
+RESUME = "resume"
+COMPLETE = "complete"
+
+PHASES = (CREATE, APPEND, RESUME, COMPLETE)
+
+UPLOADS_PATH = "/uploads/"
+
+# Module run by the server process, also used as its URLconf
+MODULE = "drf_chunked_upload.loadtest"
+
+
+def __getattr__(name):
+    # URLconf of the server, built once Django is set up
+    if name == "urlpatterns":
+        from django.urls import path
+
+        from .views import ChunkedUploadView
+
+        return [
+            path(
+                UPLOADS_PATH.strip("/") + "/",
+                ChunkedUploadView.as_view(),
+                name="chunkedupload-list",
+            ),
+            path(
+                UPLOADS_PATH.strip("/") + "/<uuid:pk>/",
+                ChunkedUploadView.as_view(),
+                name="chunkedupload-detail",
+            ),
+        ]
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+
+def configure(database, media_root, settings_module=None):
+    """
+    Configure Django for the server: the given settings module, or a
+    minimal project on a SQLite `database`.
+    """
+    import django
+    from django.conf import settings
+
+    if settings_module:
+        os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+    else:
+        settings.configure(
+            SECRET_KEY=os.urandom(16).hex(),
+            ALLOWED_HOSTS=["127.0.0.1", "localhost"],
+            INSTALLED_APPS=[
+                "django.contrib.auth",
+                "django.contrib.contenttypes",
+                "rest_framework",
+                "drf_chunked_upload",
+            ],
+            DATABASES={
+                "default": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": database,
+                    "OPTIONS": {"timeout": 60},
+                }
+            },
+            MEDIA_ROOT=media_root,
+            USE_TZ=True,
+            REST_FRAMEWORK={
+                "DEFAULT_AUTHENTICATION_CLASSES": [],
+                "DEFAULT_PERMISSION_CLASSES": [],
+            },
+            LOGGING={
+                "version": 1,
+                "disable_existing_loggers": False,
+                "loggers": {"django.server": {"level": "ERROR"}},
+            },
+        )
+
+    django.setup()
+    settings.ROOT_URLCONF = MODULE
+
+
+def serve(port, database, media_root, settings_module=None, migrate=True):
+    """
+    Serve the app until the process is terminated, migrating the database
+    first if `migrate` is true.
+    """
+    configure(database, media_root, settings_module=settings_module)
+
+    from django.core.management import call_command
+    from django.core.servers.basehttp import run
+    from django.core.wsgi import get_wsgi_application
+
+    if migrate:
+        call_command("migrate", verbosity=0, interactive=False)
+    run("127.0.0.1", port, get_wsgi_application(), threading=True)
+
+
+def delete_uploads(upload_ids, database, media_root, settings_module=None):
+    """
+    Delete the uploads created by the load test, and their files.
+    """
+    configure(database, media_root, settings_module=settings_module)
+
+    from .models import ChunkedUpload
+
+    # Keep the number of query parameters within the limits of SQLite
+    for start in range(0, len(upload_ids), 500):
+        ids = upload_ids[start:start + 500]
+        for chunked_upload in ChunkedUpload.objects.filter(pk__in=ids):
+            chunked_upload.delete()
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_rss(pid):
+    """
+    Current and peak resident memory (in bytes) of process `pid`, read from
+    `/proc`. `None` where it isn't available.
+    """
+    memory = {"VmRSS": None, "VmHWM": None}
+    try:
+        with open("/proc/%s/status" % pid) as status:
+            for line in status:
+                name, _, value = line.partition(":")
+                if name in memory:
+                    memory[name] = int(value.split()[0]) * 1024
+    except (IOError, OSError):
+        pass
+    return memory["VmRSS"], memory["VmHWM"]
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of `values`.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, int(math.ceil(percent / 100.0 * len(values))) - 1)]
+
+
+class LoadTest(object):
+    """
+    Runs `uploads` uploads of `size` bytes, `concurrency` at a time, against
+    the server at `url`. Each chunk fails with a probability of
+    `failure_rate`: its response is dropped, as if the connection broke
+    after the server stored it, so the client sends the chunk again at the
+    stale offset and resumes from the offset of the server's "Offsets do
+    not match" error.
+    """
+
+    def __init__(
+        self,
+        url,
+        uploads=200,
+        concurrency=50,
+        size=4 * 1024 * 1024,
+        chunk_size=512 * 1024,
+        failure_rate=0.05,
+        checksum_type="md5",
+        seed=None,
+    ):
+        self.url = url
+        self.uploads = uploads
+        self.concurrency = concurrency
+        self.size = size
+        self.chunk_size = chunk_size
+        self.failure_rate = failure_rate
+        self.checksum_type = checksum_type
+        self.random = random.Random(seed)
+
+        # All uploads send the same data
+        self.data = os.urandom(size)
+        self.checksum = hashlib.new(checksum_type, self.data).hexdigest()
+
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.completed = 0
+        # IDs of the uploads created, to clean them up
+        self.upload_ids = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def request(self, phase, method, url, expected_status=200, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            response = None
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.latencies[phase].append(elapsed)
+            if response is None or response.status_code != expected_status:
+                self.errors[phase] += 1
+                return None
+        return response.json()
+
+    def put_chunk(self, phase, url, offset, expected_status=200):
+        end = min(offset + self.chunk_size, self.size)
+        return self.request(
+            phase,
+            "put",
+            url,
+            expected_status=expected_status,
+            data={"filename": "loadtest.bin"},
+            files={"file": ("loadtest.bin", self.data[offset:end])},
+            headers={"Content-Range": "bytes %s-%s/%s" % (offset, end - 1, self.size)},
+        )
+
+    def run_upload(self, index):
+        upload = self.put_chunk(CREATE, self.url, 0)
+        if upload is None:
+            return False
+        with self._lock:
+            self.upload_ids.append(upload["id"])
+        url, offset = upload["url"], upload["offset"]
+
+        while offset < self.size:
+            upload = self.put_chunk(APPEND, url, offset)
+            if upload is None:
+                return False
+
+            with self._lock:
+                failed = self.random.random() < self.failure_rate
+            if failed:
+                # The server rejects the chunk it already has
+                upload = self.put_chunk(RESUME, url, offset, expected_status=400)
+                if upload is None or "offset" not in upload:
+                    return False
+            offset = upload["offset"]
+
+        upload = self.request(
+            COMPLETE, "post", url, data={self.checksum_type: self.checksum}
+        )
+        if upload is None:
+            return False
+
+        with self._lock:
+            self.completed += 1
+        return True
+
+    def run(self):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(self.run_upload, range(self.uploads)))
+        self.duration = time.perf_counter() - start
+
+    def report(self):
+        phases = {}
+        for phase in PHASES:
+            latencies = self.latencies[phase]
+            phases[phase] = {
+                "requests": len(latencies),
+                "errors": self.errors[phase],
+                "p50": percentile(latencies, 50),
+                "p99": percentile(latencies, 99),
+            }
+
+        return {
+            "uploads": self.uploads,
+            "completed": self.completed,
+            "failed": self.uploads - self.completed,
+            "concurrency": self.concurrency,
+            "duration": self.duration,
+            "uploads_per_second": self.completed / self.duration,
+            "bytes_per_second": self.completed * self.size / self.duration,
+            "phases": phases,
+        }
+
+
+def wait_for_server(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited with code %s" % process.returncode)
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError("The server didn't start within %s seconds" % timeout)
+
+
+def format_report(report):
+    def ms(value):
+        return "-" if value is None else "%.1f" % (value * 1000)
+
+    def mib(value):
+        return "n/a" if value is None else "%.1f MiB" % (value / 1024.0 / 1024)
+
+    lines = [
+        "Uploads: %(completed)s completed, %(failed)s failed in %(duration).1f s"
+        % report,
+        "Throughput: %.1f uploads/s, %s/s"
+        % (report["uploads_per_second"], mib(report["bytes_per_second"])),
+        "",
+        "%-10s %10s %8s %10s %10s" % ("Phase", "Requests", "Errors", "p50 (ms)", "p99 (ms)"),
+    ]
+    for phase in PHASES:
+        stats = report["phases"][phase]
+        lines.append(
+            "%-10s %10s %8s %10s %10s"
+            % (phase, stats["requests"], stats["errors"], ms(stats["p50"]), ms(stats["p99"]))
+        )
+    lines.extend(
+        [
+            "",
+            "Server RSS: %s at start, %s peak"
+            % (mib(report["server_start_rss"]), mib(report["server_peak_rss"])),
+        ]
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--uploads", type=int, default=200, help="Number of uploads.")
+    parser.add_argument(
+        "--concurrency", type=int, default=50, help="Number of concurrent clients."
+    )
+    parser.add_argument(
+        "--size", type=int, default=4 * 1024 * 1024, help="Size of each upload in bytes."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=512 * 1024, help="Size of each chunk in bytes."
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.05,
+        help="Probability of the response of a chunk being lost.",
+    )
+    parser.add_argument("--seed", type=int, help="Seed of the injected failures.")
+    parser.add_argument(
+        "--database",
+        help="SQLite database of the server. Default: a temporary database.",
+    )
+    parser.add_argument(
+        "--settings",
+        help="Django settings module of the server, instead of the built-in "
+        "SQLite project. Its database and storage are written to, and its "
+        "ROOT_URLCONF is replaced.",
+    )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Migrate the database of --settings before the test.",
+    )
+    parser.add_argument(
+        "--keep-uploads",
+        action="store_true",
+        help="Don't delete the uploads created in --settings or --database.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--media-root", help=argparse.SUPPRESS)
+    parser.add_argument("--delete-uploads", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(
+            args.port,
+            args.database,
+            args.media_root,
+            args.settings,
+            # The built-in project always starts with an empty database
+            migrate=args.migrate or not args.settings,
+        )
+        return
+
+    if args.delete_uploads:
+        with open(args.delete_uploads) as f:
+            upload_ids = json.load(f)
+        delete_uploads(upload_ids, args.database, args.media_root, args.settings)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="drf_chunked_upload_loadtest") as tmp:
+        port = get_free_port()
+        options = [
+            "--database",
+            args.database or os.path.join(tmp, "db.sqlite3"),
+            "--media-root",
+            os.path.join(tmp, "media"),
+        ]
+        if args.settings:
+            options.extend(["--settings", args.settings])
+        if args.migrate:
+            options.append("--migrate")
+
+        url = "http://127.0.0.1:%s%s" % (port, UPLOADS_PATH)
+        server = subprocess.Popen(
+            [sys.executable, "-m", MODULE, "--serve", "--port", str(port)] + options
+        )
+        try:
+            wait_for_server(url, server)
+            start_rss, _ = get_rss(server.pid)
+
+            load_test = LoadTest(
+                url,
+                uploads=args.uploads,
+                concurrency=args.concurrency,
+                size=args.size,
+                chunk_size=args.chunk_size,
+                failure_rate=args.failure_rate,
+                seed=args.seed,
+            )
+            load_test.run()
+            _, peak_rss = get_rss(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+        # Uploads in the temporary database go away with it
+        if (args.settings or args.database) and not args.keep_uploads:
+            upload_ids = os.path.join(tmp, "uploads.json")
+            with open(upload_ids, "w") as f:
+                json.dump(load_test.upload_ids, f)
+            subprocess.check_call(
+                [sys.executable, "-m", MODULE, "--delete-uploads", upload_ids]
+                + options
+            )
+
+    report = load_test.report()
+    report.update(server_start_rss=start_rss, server_peak_rss=peak_rss)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
-from drf_chunked_upload.settings import EXPIRATION_DELTA
+from drf_chunked_upload.settings import chunked_upload_settings
 from drf_chunked_upload.models import ChunkedUpload
 
 
@@ -99,10 +99,10 @@ class Command(BaseCommand):
             model.__name__,
         ))
 
-        count = Counter({state[0]: 0 for state in model.STATUS_CHOICES})
+        count = Counter({state[0]: 0 for state in model.CHUNKED_UPLOAD_CHOICES})
 
         chunked_uploads = model.objects.filter(
-            created_at__lt=(timezone.now() - EXPIRATION_DELTA)
+            created_at__lt=(timezone.now() - chunked_upload_settings.EXPIRATION_DELTA)
         )
 
         if delete_record == False:
@@ -113,6 +113,7 @@ class Command(BaseCommand):
                 continue
 
             count[chunked_upload.status] += 1
+            chunked_upload.publish_event(chunked_upload.EXPIRED)
             # Deleting objects individually to call delete method explicitly
             if delete_record:
                 chunked_upload.delete()
@@ -124,7 +125,7 @@ class Command(BaseCommand):
             print(
                 '{} {} upload{}s were deleted.'.format(
                     number,
-                    dict(model.STATUS_CHOICES)[state].lower(),
+                    dict(model.CHUNKED_UPLOAD_CHOICES)[state].lower(),
                     (' file' if not delete_record else ''),
                 )
             )
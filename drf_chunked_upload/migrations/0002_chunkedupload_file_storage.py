@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:53
+
+from django.db import migrations, models
+import drf_chunked_upload.settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drf_chunked_upload', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chunkedupload',
+            name='file',
+            field=models.FileField(max_length=255, storage=drf_chunked_upload.settings.ChunkedUploadStorage(), upload_to=drf_chunked_upload.settings.upload_to),
+        ),
+    ]
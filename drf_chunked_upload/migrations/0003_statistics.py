@@ -0,0 +1,86 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:56
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_in_progress(apps, schema_editor):
+    """
+    Count the uploads that are already in progress, events before this
+    migration are not recorded.
+    """
+    ChunkedUpload = apps.get_model('drf_chunked_upload', 'ChunkedUpload')
+    ChunkedUploadStatistics = apps.get_model('drf_chunked_upload', 'ChunkedUploadStatistics')
+
+    expiration_delta = getattr(
+        settings, 'DRF_CHUNKED_UPLOAD_EXPIRATION_DELTA', timedelta(days=1)
+    )
+    interval = getattr(
+        settings, 'DRF_CHUNKED_UPLOAD_STATISTICS_INTERVAL', timedelta(minutes=5)
+    ).total_seconds()
+
+    uploads = ChunkedUpload.objects.filter(
+        status=1,  # UPLOADING
+        created_at__gt=timezone.now() - expiration_delta,
+    )
+
+    periods = {}
+    for created_at, offset in uploads.values_list('created_at', 'offset').iterator():
+        # Start of the statistics period containing `created_at`
+        timestamp = created_at.timestamp()
+        start = datetime.fromtimestamp(
+            timestamp - timestamp % interval, tz=created_at.tzinfo
+        )
+        period = periods.setdefault(start, {'uploads_active': 0, 'bytes_active': 0})
+        period['uploads_active'] += 1
+        period['bytes_active'] += offset
+
+    ChunkedUploadStatistics.objects.bulk_create(
+        ChunkedUploadStatistics(period=period, **values)
+        for period, values in periods.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drf_chunked_upload', '0002_chunkedupload_file_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUploadStatistics',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('period', models.DateTimeField()),
+                ('bucket', models.PositiveSmallIntegerField(default=0)),
+                ('uploads_created', models.BigIntegerField(default=0)),
+                ('uploads_completed', models.BigIntegerField(default=0)),
+                ('uploads_deleted', models.BigIntegerField(default=0)),
+                ('chunks_received', models.BigIntegerField(default=0)),
+                ('bytes_received', models.BigIntegerField(default=0)),
+                ('uploads_active', models.BigIntegerField(default=0)),
+                ('bytes_active', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'chunked upload statistics',
+                'unique_together': {('period', 'bucket')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='chunkedupload',
+            index=models.Index(fields=['created_at'], name='drf_chunked_created_188549_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chunkedupload',
+            index=models.Index(fields=['status', 'created_at'], name='drf_chunked_status_d6fe27_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chunkedupload',
+            index=models.Index(fields=['filename'], name='drf_chunked_filename_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_in_progress, migrations.RunPython.noop),
+    ]
@@ -1,25 +1,21 @@
-import hashlib
 import os
+import random
 import time
 import uuid
+from datetime import datetime
 from tempfile import SpooledTemporaryFile
 
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage
 from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum
+from django.db.models.signals import class_prepared, post_delete
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
-from .settings import (
-    CHECKSUM_TYPE,
-    DEFAULT_MODEL_USER_FIELD_BLANK,
-    DEFAULT_MODEL_USER_FIELD_NULL,
-    EXPIRATION_DELTA,
-    INCOMPLETE_EXT,
-    STORAGE,
-    UPLOAD_TO,
-)
+from . import checksums, events
+from .settings import chunked_upload_settings, storage, upload_to
 
 
 class AbstractChunkedUpload(models.Model):
@@ -32,6 +28,18 @@ class AbstractChunkedUpload(models.Model):
     UPLOADING = 1
     COMPLETE = 2
 
+    # Events recorded in `ChunkedUploadStatistics` and published to the
+    # events backend
+    CREATED = "created"
+    CHUNK = "chunk"
+    COMPLETED = "completed"
+    DELETED = "deleted"
+    # Only published, by `delete_expired_uploads`
+    EXPIRED = "expired"
+
+    # Events after which an upload doesn't change anymore
+    FINAL_EVENTS = (COMPLETED, DELETED, EXPIRED)
+
     CHUNKED_UPLOAD_CHOICES = (
         (UPLOADING, _("Uploading")),
         (COMPLETE, _("Complete")),
@@ -39,7 +47,7 @@ class AbstractChunkedUpload(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
-    file = models.FileField(max_length=255, upload_to=UPLOAD_TO, storage=STORAGE)
+    file = models.FileField(max_length=255, upload_to=upload_to, storage=storage)
     filename = models.CharField(max_length=255)
     offset = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -50,7 +58,7 @@ class AbstractChunkedUpload(models.Model):
 
     @property
     def expires_at(self):
-        return self.created_at + EXPIRATION_DELTA
+        return self.created_at + chunked_upload_settings.EXPIRATION_DELTA
 
     @property
     def expired(self):
@@ -64,23 +72,133 @@ class AbstractChunkedUpload(models.Model):
     @property
     def checksum(self):
         if getattr(self, "_checksum", None) is None:
-            h = hashlib.new(CHECKSUM_TYPE)
-            for chunk in self.file.chunks():
-                h.update(chunk)
-            self._checksum = h.hexdigest()
+            self._checksum = self.compute_checksum()
         return self._checksum
 
+    def compute_checksum(self):
+        options = {
+            "checksum_type": chunked_upload_settings.CHECKSUM_TYPE,
+            "mode": chunked_upload_settings.CHECKSUM_MODE,
+            "block_size": chunked_upload_settings.CHECKSUM_BLOCK_SIZE,
+        }
+
+        # Files on `FileSystemStorage` can be memory mapped (and hashed in
+        # parallel in tree mode), other storages are streamed in blocks
+        if isinstance(self.file.storage, FileSystemStorage):
+            return checksums.hash_file(
+                self.file.path,
+                workers=chunked_upload_settings.CHECKSUM_WORKERS,
+                executor=chunked_upload_settings.CHECKSUM_EXECUTOR,
+                **options
+            )
+
+        return checksums.hash_chunks(
+            self.file.chunks(chunk_size=options["block_size"]), **options
+        )
+
     def delete_file(self):
         if self.file:
             storage, name = self.file.storage, self.file.name
             storage.delete(name)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super(AbstractChunkedUpload, self).save(*args, **kwargs)
+        if adding:
+            self.record_event(self.CREATED)
+
+        # Changes are only recorded once they are saved
+        pending_events = getattr(self, "_pending_events", [])
+        self._pending_events = []
+        for event, chunk_size in pending_events:
+            self.record_event(event, chunk_size=chunk_size)
+
     @transaction.atomic
     def delete(self, delete_file=True, *args, **kwargs):
-        super(ChunkedUpload, self).delete(*args, **kwargs)
+        super(AbstractChunkedUpload, self).delete(*args, **kwargs)
         if delete_file:
             self.delete_file()
 
+    def add_pending_event(self, event, chunk_size=0):
+        """
+        Record `event` when the upload is next saved.
+        """
+        self._pending_events = getattr(self, "_pending_events", [])
+        self._pending_events.append((event, chunk_size))
+
+    def record_event(self, event, chunk_size=0):
+        """
+        Record `event` in the statistics and publish it. Deletions are
+        recorded by `record_deletion`, also for queryset and cascade deletes.
+        """
+        self.record_statistics(event, chunk_size=chunk_size)
+        self.publish_event(event)
+
+    def get_event_data(self, event):
+        return {
+            "event": event,
+            "id": str(self.id),
+            "filename": self.filename,
+            "offset": self.offset,
+            "status": self.status,
+            "expires_at": self.expires_at.isoformat(),
+        }
+
+    def publish_event(self, event):
+        """
+        Publish `event` to the channels of the upload and of its user, once
+        the current transaction is committed.
+        """
+        backend = chunked_upload_settings.EVENTS_BACKEND
+        if backend is None:
+            return
+
+        data = self.get_event_data(event)
+        channels = [events.upload_channel(self.id)]
+        user_id = getattr(self, "user_id", None)
+        if user_id is not None:
+            channels.append(events.user_channel(user_id))
+
+        def publish():
+            for channel in channels:
+                backend.publish(channel, data)
+
+        transaction.on_commit(publish)
+
+    def record_statistics(self, event, chunk_size=0):
+        """
+        Update `ChunkedUploadStatistics` for `event`, once the current
+        transaction is committed. Event counters go to the current period,
+        in progress counters to the period in which the upload was created.
+        """
+        counts = {}
+        in_progress = {}
+
+        if event == self.CREATED:
+            counts = {
+                "uploads_created": 1,
+                "chunks_received": 1,
+                "bytes_received": self.offset,
+            }
+            in_progress = {"uploads_active": 1, "bytes_active": self.offset}
+        elif event == self.CHUNK:
+            counts = {"chunks_received": 1, "bytes_received": chunk_size}
+            in_progress = {"bytes_active": chunk_size}
+        elif event == self.COMPLETED:
+            counts = {"uploads_completed": 1}
+            in_progress = {"uploads_active": -1, "bytes_active": -self.offset}
+        elif event == self.DELETED:
+            counts = {"uploads_deleted": 1}
+            if self.status == self.UPLOADING:
+                in_progress = {"uploads_active": -1, "bytes_active": -self.offset}
+
+        now, created_at = timezone.now(), self.created_at
+        transaction.on_commit(
+            lambda: ChunkedUploadStatistics.objects.record(
+                now, counts, created_at, in_progress
+            )
+        )
+
     def __str__(self):
         return u"<%s - id: %s - bytes: %s - status: %s>" % (
             self.filename,
@@ -91,6 +209,7 @@ class AbstractChunkedUpload(models.Model):
 
     def append_chunk(self, chunk, chunk_size=None, save=True):
         storage = self.file.storage
+        old_offset = self.offset
 
         # Create a temporary file that will write to disk after a specified
         # size. This file will be automatically deleted when closed after 
@@ -125,6 +244,8 @@ class AbstractChunkedUpload(models.Model):
             self.offset = self.file.size
         self._checksum = None  # Clear cached checksum
 
+        self.add_pending_event(self.CHUNK, chunk_size=self.offset - old_offset)
+
         if save:
             self.save()
 
@@ -155,6 +276,7 @@ class AbstractChunkedUpload(models.Model):
 
         self.status = self.COMPLETE
         self.completed_at = completed_at
+        self.add_pending_event(self.COMPLETED)
         self.save()
 
         # If we're using `FileSystemStorage` then we can simply rename
@@ -179,6 +301,22 @@ class AbstractChunkedUpload(models.Model):
         abstract = True
 
 
+def record_deletion(sender, instance, **kwargs):
+    """
+    `post_delete` receiver of chunked upload models, so that deletions are
+    recorded for each upload deleted, also by queryset and cascade deletes.
+    """
+    instance.record_event(instance.DELETED)
+
+
+def connect_chunked_upload(sender, **kwargs):
+    if issubclass(sender, AbstractChunkedUpload):
+        post_delete.connect(record_deletion, sender=sender)
+
+
+class_prepared.connect(connect_chunked_upload)
+
+
 class ChunkedUpload(AbstractChunkedUpload):
     """
     Default chunked upload model.
@@ -188,6 +326,162 @@ class ChunkedUpload(AbstractChunkedUpload):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="chunked_uploads",
-        null=DEFAULT_MODEL_USER_FIELD_NULL,
-        blank=DEFAULT_MODEL_USER_FIELD_BLANK,
+        null=chunked_upload_settings.MODEL_USER_FIELD_NULL,
+        blank=chunked_upload_settings.MODEL_USER_FIELD_BLANK,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["status", "created_at"]),
+            # Serves the prefix search of the admin, also on PostgreSQL
+            # with a collation other than C
+            models.Index(
+                fields=["filename"],
+                name="drf_chunked_filename_like",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+
+def get_statistics_period(at):
+    """
+    Start of the statistics period (`DRF_CHUNKED_UPLOAD_STATISTICS_INTERVAL`)
+    containing `at`.
+    """
+    interval = chunked_upload_settings.STATISTICS_INTERVAL.total_seconds()
+    timestamp = at.timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % interval, tz=at.tzinfo)
+
+
+class ChunkedUploadStatisticsManager(models.Manager):
+    def record(self, at, counts, created_at=None, in_progress=None):
+        """
+        Add `counts` to the period containing `at` and `in_progress` to the
+        period containing `created_at`.
+        """
+        if not chunked_upload_settings.STATISTICS:
+            return
+
+        periods = {}
+        for period_at, values in ((at, counts), (created_at, in_progress)):
+            values = {name: value for name, value in (values or {}).items() if value}
+            if values:
+                period = periods.setdefault(get_statistics_period(period_at), {})
+                for name, value in values.items():
+                    period[name] = period.get(name, 0) + value
+
+        for period, values in periods.items():
+            self._increment(period, values)
+
+    def _increment(self, period, values):
+        # Each period is spread over several rows, so that concurrent
+        # updates rarely wait for each other
+        bucket = random.randrange(chunked_upload_settings.STATISTICS_BUCKETS)
+        rows = self.filter(period=period, bucket=bucket)
+
+        updates = {name: F(name) + value for name, value in values.items()}
+        if rows.update(**updates):
+            return
+
+        # First event of the bucket, another process may be creating it too
+        try:
+            with transaction.atomic():
+                self.create(period=period, bucket=bucket, **values)
+        except IntegrityError:
+            rows.update(**updates)
+
+    def by_period(self):
+        """
+        Statistics of each period, most recent first, summed over buckets.
+        """
+        return (
+            self.values("period")
+            .annotate(**{name: Sum(name) for name in self.model.COUNTERS})
+            .order_by("-period")
+        )
+
+    def summary(self, now=None):
+        """
+        Current state of uploads, computed from the statistics periods only.
+        Values are approximated to the statistics interval.
+        """
+        now = now or timezone.now()
+        expiration_delta = chunked_upload_settings.EXPIRATION_DELTA
+        window = chunked_upload_settings.STATISTICS_WINDOW
+
+        # Uploads created before `now - expiration_delta` have expired
+        in_progress = self.filter(period__gt=now - expiration_delta)
+        totals = in_progress.aggregate(
+            active_uploads=Sum("uploads_active"), bytes_in_progress=Sum("bytes_active")
+        )
+        totals.update(
+            in_progress.filter(period__lte=now - expiration_delta + window).aggregate(
+                expiring_soon=Sum("uploads_active")
+            )
+        )
+        totals.update(
+            self.filter(period__gt=now - window).aggregate(
+                uploads_created=Sum("uploads_created"),
+                uploads_completed=Sum("uploads_completed"),
+                uploads_deleted=Sum("uploads_deleted"),
+                chunks_received=Sum("chunks_received"),
+                bytes_received=Sum("bytes_received"),
+            )
+        )
+        totals = {name: value or 0 for name, value in totals.items()}
+
+        totals.update(
+            window=window.total_seconds(),
+            throughput=totals["bytes_received"] / window.total_seconds(),
+            completion_rate=(
+                totals["uploads_completed"] / totals["uploads_created"]
+                if totals["uploads_created"]
+                else None
+            ),
+        )
+        return totals
+
+
+class ChunkedUploadStatistics(models.Model):
+    """
+    Upload activity per period of `DRF_CHUNKED_UPLOAD_STATISTICS_INTERVAL`,
+    updated as uploads are created, receive chunks, complete or are deleted,
+    so it can be reported without scanning the uploads table. Each period
+    is split in up to `DRF_CHUNKED_UPLOAD_STATISTICS_BUCKETS` rows, which
+    have to be summed.
+    """
+
+    COUNTERS = (
+        "uploads_created",
+        "uploads_completed",
+        "uploads_deleted",
+        "chunks_received",
+        "bytes_received",
+        "uploads_active",
+        "bytes_active",
     )
+
+    id = models.AutoField(primary_key=True)
+    period = models.DateTimeField()
+    bucket = models.PositiveSmallIntegerField(default=0)
+
+    # Events that happened during the period
+    uploads_created = models.BigIntegerField(default=0)
+    uploads_completed = models.BigIntegerField(default=0)
+    uploads_deleted = models.BigIntegerField(default=0)
+    chunks_received = models.BigIntegerField(default=0)
+    bytes_received = models.BigIntegerField(default=0)
+
+    # Uploads created during the period that are still in progress
+    uploads_active = models.BigIntegerField(default=0)
+    bytes_active = models.BigIntegerField(default=0)
+
+    objects = ChunkedUploadStatisticsManager()
+
+    def __str__(self):
+        return u"<statistics - period: %s - bucket: %s>" % (self.period, self.bucket)
+
+    class Meta:
+        verbose_name_plural = "chunked upload statistics"
+        unique_together = (("period", "bucket"),)
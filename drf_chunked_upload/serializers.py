@@ -2,7 +2,7 @@ from rest_framework import serializers
 from rest_framework.reverse import reverse
 
 from .models import ChunkedUpload
-from .settings import NAMED_URL
+from .settings import chunked_upload_settings
 
 
 class ChunkedUploadSerializer(serializers.ModelSerializer):
@@ -10,7 +10,9 @@ class ChunkedUploadSerializer(serializers.ModelSerializer):
 
     def get_url(self, obj):
         return reverse(
-            NAMED_URL, kwargs={"pk": obj.id}, request=self.context["request"]
+            chunked_upload_settings.NAMED_URL,
+            kwargs={"pk": obj.id},
+            request=self.context["request"],
         )
 
     class Meta:
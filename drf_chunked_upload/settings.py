@@ -1,57 +1,257 @@
 import os.path
+import threading
 import time
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.files.storage import Storage, default_storage
+from django.core.signals import setting_changed
+from django.utils.functional import LazyObject, empty
 from django.utils.module_loading import import_string
 
+from . import checksums
+
 # How long after creation the upload will expire
 DEFAULT_EXPIRATION_DELTA = timedelta(days=1)
-EXPIRATION_DELTA = getattr(
-    settings, "DRF_CHUNKED_UPLOAD_EXPIRATION_DELTA", DEFAULT_EXPIRATION_DELTA
-)
 
 # Path where uploading files will be stored until completion
 DEFAULT_UPLOAD_PATH = "chunked_uploads/%Y/%m/%d"
-UPLOAD_PATH = getattr(settings, "DRF_CHUNKED_UPLOAD_PATH", DEFAULT_UPLOAD_PATH)
 
 # File extensions for upload files
-INCOMPLETE_EXT = getattr(settings, "DRF_CHUNKED_UPLOAD_INCOMPLETE_EXT", ".part")
+DEFAULT_INCOMPLETE_EXT = ".part"
+
+# Checksum type to use when verifying files
+DEFAULT_CHECKSUM_TYPE = "md5"
+
+# How files are hashed ("linear" or "tree"), see `checksums`
+DEFAULT_CHECKSUM_MODE = checksums.LINEAR
+
+# Size of the blocks hashed in parallel in "tree" mode
+DEFAULT_CHECKSUM_BLOCK_SIZE = checksums.DEFAULT_BLOCK_SIZE
+
+# Max amount of data (in bytes) that can be uploaded. `None` means no limit
+DEFAULT_MAX_BYTES = None
+
+# Upload URL
+DEFAULT_NAMED_URL = "chunkedupload-detail"
+
+# Length of the periods in which upload statistics are aggregated
+DEFAULT_STATISTICS_INTERVAL = timedelta(minutes=5)
+
+# Time span used for throughput, completion rate and expiring uploads
+DEFAULT_STATISTICS_WINDOW = timedelta(hours=1)
+
+# Number of rows each statistics period is split in
+DEFAULT_STATISTICS_BUCKETS = 8
+
+# Publish/subscribe backend of upload events
+DEFAULT_EVENTS_BACKEND = "drf_chunked_upload.events.InProcessEventBackend"
+
+# Seconds between keep-alive comments of idle event streams
+DEFAULT_EVENTS_KEEPALIVE = 15
+
 
 # upload_to function to be used in the FileField
 def default_upload_to(instance, filename):
-    filename = os.path.join(UPLOAD_PATH, str(instance.id) + INCOMPLETE_EXT)
+    filename = os.path.join(
+        chunked_upload_settings.UPLOAD_PATH,
+        str(instance.id) + chunked_upload_settings.INCOMPLETE_EXT,
+    )
     return time.strftime(filename)
 
 
-UPLOAD_TO = getattr(settings, "DRF_CHUNKED_UPLOAD_TO", default_upload_to)
+def upload_to(instance, filename):
+    """
+    `upload_to` of the FileField, deferring to the configured function so
+    that it can be changed without a migration.
+    """
+    return chunked_upload_settings.UPLOAD_TO(instance, filename)
 
-# Checksum type to use when verifying files
-DEFAULT_CHECKSUM_TYPE = "md5"
-CHECKSUM_TYPE = getattr(settings, "DRF_CHUNKED_UPLOAD_CHECKSUM", DEFAULT_CHECKSUM_TYPE)
 
-# Storage system
-try:
-    STORAGE = getattr(settings, "DRF_CHUNKED_UPLOAD_STORAGE_CLASS", lambda: None)()
-except TypeError:
-    STORAGE = import_string(
-        getattr(settings, "DRF_CHUNKED_UPLOAD_STORAGE_CLASS", lambda: None)
-    )()
+# Setting name in the project settings and default value, for each setting
+SETTINGS = {
+    "EXPIRATION_DELTA": (
+        "DRF_CHUNKED_UPLOAD_EXPIRATION_DELTA",
+        DEFAULT_EXPIRATION_DELTA,
+    ),
+    "UPLOAD_PATH": ("DRF_CHUNKED_UPLOAD_PATH", DEFAULT_UPLOAD_PATH),
+    "INCOMPLETE_EXT": ("DRF_CHUNKED_UPLOAD_INCOMPLETE_EXT", DEFAULT_INCOMPLETE_EXT),
+    "UPLOAD_TO": ("DRF_CHUNKED_UPLOAD_TO", default_upload_to),
+    "CHECKSUM_TYPE": ("DRF_CHUNKED_UPLOAD_CHECKSUM", DEFAULT_CHECKSUM_TYPE),
+    "CHECKSUM_MODE": ("DRF_CHUNKED_UPLOAD_CHECKSUM_MODE", DEFAULT_CHECKSUM_MODE),
+    "CHECKSUM_BLOCK_SIZE": (
+        "DRF_CHUNKED_UPLOAD_CHECKSUM_BLOCK_SIZE",
+        DEFAULT_CHECKSUM_BLOCK_SIZE,
+    ),
+    # Number of workers hashing blocks in parallel, `None` to pick from the
+    # number of CPUs, and whether they are threads or processes
+    "CHECKSUM_WORKERS": ("DRF_CHUNKED_UPLOAD_CHECKSUM_WORKERS", None),
+    "CHECKSUM_EXECUTOR": ("DRF_CHUNKED_UPLOAD_CHECKSUM_EXECUTOR", checksums.THREAD),
+    # Storage system, a class or its dotted path
+    "STORAGE_CLASS": ("DRF_CHUNKED_UPLOAD_STORAGE_CLASS", None),
+    # Boolean that defines if users beside the creator can access an upload record
+    "USER_RESTRICTED": ("DRF_CHUNKED_UPLOAD_USER_RESTRICED", True),
+    "MAX_BYTES": ("DRF_CHUNKED_UPLOAD_MAX_BYTES", DEFAULT_MAX_BYTES),
+    # determine the "null" and "blank" properties of "user" field in the
+    # "ChunkedUpload" model. These are only read when the model is created.
+    "MODEL_USER_FIELD_NULL": ("CHUNKED_UPLOAD_MODEL_USER_FIELD_NULL", True),
+    "MODEL_USER_FIELD_BLANK": ("CHUNKED_UPLOAD_MODEL_USER_FIELD_BLANK", True),
+    "NAMED_URL": ("DRF_CHUNKED_UPLOAD_NAMED_URL", DEFAULT_NAMED_URL),
+    # Boolean that defines if upload statistics are recorded
+    "STATISTICS": ("DRF_CHUNKED_UPLOAD_STATISTICS", True),
+    "STATISTICS_INTERVAL": (
+        "DRF_CHUNKED_UPLOAD_STATISTICS_INTERVAL",
+        DEFAULT_STATISTICS_INTERVAL,
+    ),
+    "STATISTICS_WINDOW": (
+        "DRF_CHUNKED_UPLOAD_STATISTICS_WINDOW",
+        DEFAULT_STATISTICS_WINDOW,
+    ),
+    "STATISTICS_BUCKETS": (
+        "DRF_CHUNKED_UPLOAD_STATISTICS_BUCKETS",
+        DEFAULT_STATISTICS_BUCKETS,
+    ),
+    # Events backend, a class or its dotted path. `None` disables events
+    "EVENTS_BACKEND_CLASS": (
+        "DRF_CHUNKED_UPLOAD_EVENTS_BACKEND",
+        DEFAULT_EVENTS_BACKEND,
+    ),
+    # Keyword arguments of the events backend
+    "EVENTS_BACKEND_OPTIONS": ("DRF_CHUNKED_UPLOAD_EVENTS_BACKEND_OPTIONS", {}),
+    "EVENTS_KEEPALIVE": (
+        "DRF_CHUNKED_UPLOAD_EVENTS_KEEPALIVE",
+        DEFAULT_EVENTS_KEEPALIVE,
+    ),
+}
 
-# Boolean that defines if users beside the creator can access an upload record
-USER_RESTRICTED = getattr(settings, "DRF_CHUNKED_UPLOAD_USER_RESTRICED", True)
+# Attributes created from the settings, once per process
+INSTANCES = {"STORAGE", "EVENTS_BACKEND"}
 
-# Max amount of data (in bytes) that can be uploaded. `None` means no limit
-DEFAULT_MAX_BYTES = None
-MAX_BYTES = getattr(settings, "DRF_CHUNKED_UPLOAD_MAX_BYTES", DEFAULT_MAX_BYTES)
+# Settings that the events backend is created from
+EVENTS_BACKEND_SETTINGS = {
+    SETTINGS["EVENTS_BACKEND_CLASS"][0],
+    SETTINGS["EVENTS_BACKEND_OPTIONS"][0],
+}
 
-# determine the "null" and "blank" properties of "user" field in the "ChunkedUpload" model
-DEFAULT_MODEL_USER_FIELD_NULL = getattr(
-    settings, "CHUNKED_UPLOAD_MODEL_USER_FIELD_NULL", True
-)
-DEFAULT_MODEL_USER_FIELD_BLANK = getattr(
-    settings, "CHUNKED_UPLOAD_MODEL_USER_FIELD_BLANK", True
-)
 
-# Upload URL
-NAMED_URL = getattr(settings, "DRF_CHUNKED_UPLOAD_NAMED_URL", "chunkedupload-detail")
+class ChunkedUploadSettings(object):
+    """
+    Settings of the app, read from the project settings on first access and
+    cached until one of them changes (e.g. with `override_settings`).
+    """
+
+    # Reentrant, as creating an instance reads the settings of its class
+    _lock = threading.RLock()
+
+    def __getattr__(self, attr):
+        if attr in INSTANCES:
+            with self._lock:
+                # Another thread may have created it while this one waited
+                if attr in self.__dict__:
+                    return self.__dict__[attr]
+                if attr == "STORAGE":
+                    value = self._get_storage()
+                else:
+                    value = self._get_events_backend()
+                setattr(self, attr, value)
+            return value
+        elif attr in SETTINGS:
+            setting, default = SETTINGS[attr]
+            value = getattr(settings, setting, default)
+        else:
+            raise AttributeError("Invalid chunked upload setting: '%s'" % attr)
+
+        # Cache the result
+        setattr(self, attr, value)
+        return value
+
+    def _get_storage(self):
+        storage_class = self.STORAGE_CLASS
+        if storage_class is None:
+            return None
+        if isinstance(storage_class, str):
+            storage_class = import_string(storage_class)
+        return storage_class()
+
+    def _get_events_backend(self):
+        backend_class = self.EVENTS_BACKEND_CLASS
+        if backend_class is None:
+            return None
+        if isinstance(backend_class, str):
+            backend_class = import_string(backend_class)
+        return backend_class(**self.EVENTS_BACKEND_OPTIONS)
+
+    def reload(self, setting=None):
+        """
+        Forget the cached settings, after `setting` changed (all of them by
+        default). The events backend is kept unless its own settings
+        changed, so that its subscribers still get the events.
+        """
+        with self._lock:
+            events_backend = self.__dict__.get("EVENTS_BACKEND", empty)
+            self.__dict__.clear()
+            storage._wrapped = empty
+            if setting is not None and setting not in EVENTS_BACKEND_SETTINGS:
+                if events_backend is not empty:
+                    self.EVENTS_BACKEND = events_backend
+
+
+chunked_upload_settings = ChunkedUploadSettings()
+
+
+class ChunkedUploadStorage(LazyObject, Storage):
+    """
+    Storage used by the FileField. The configured storage is only created
+    when files are first accessed, falling back to the default storage.
+
+    It is a `Storage` (and always true) so that `FileField` accepts it
+    without creating the storage when the model is defined.
+    """
+
+    def _setup(self):
+        self._wrapped = chunked_upload_settings.STORAGE or default_storage
+
+    def __bool__(self):
+        return True
+
+    def deconstruct(self):
+        return ("drf_chunked_upload.settings.ChunkedUploadStorage", (), {})
+
+
+def _storage_method(name):
+    def method(self, *args, **kwargs):
+        if self._wrapped is empty:
+            self._setup()
+        return getattr(self._wrapped, name)(*args, **kwargs)
+
+    method.__name__ = name
+    return method
+
+
+# The methods implemented by `Storage` are found before `__getattr__`, so
+# they have to be proxied explicitly
+for name, value in list(vars(Storage).items()):
+    if callable(value) and not name.startswith("__"):
+        setattr(ChunkedUploadStorage, name, _storage_method(name))
+del name, value
+
+
+storage = ChunkedUploadStorage()
+
+
+def reload_settings(*args, **kwargs):
+    setting = kwargs["setting"]
+    if setting in {name for name, default in SETTINGS.values()}:
+        chunked_upload_settings.reload(setting)
+
+
+setting_changed.connect(reload_settings)
+
+
+def __getattr__(name):
+    # Module level settings, kept for backwards compatibility
+    if name in SETTINGS or name == "STORAGE":
+        return getattr(chunked_upload_settings, name)
+    if name in ("DEFAULT_MODEL_USER_FIELD_NULL", "DEFAULT_MODEL_USER_FIELD_BLANK"):
+        return getattr(chunked_upload_settings, name[len("DEFAULT_"):])
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
@@ -0,0 +1,32 @@
+# Tests of the app, run from a project that has it installed, e.g.
+# `python manage.py test drf_chunked_upload`. They use their own URLconf,
+# `drf_chunked_upload.tests.urls`.
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+
+class TemporaryMediaMixin(object):
+    """
+    Gives each test a temporary directory, `self.directory`, holding its
+    `MEDIA_ROOT`.
+    """
+
+    def setUp(self):
+        super(TemporaryMediaMixin, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        media_root = override_settings(
+            MEDIA_ROOT=os.path.join(self.directory, "media")
+        )
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def write_file(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
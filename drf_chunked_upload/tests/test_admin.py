@@ -0,0 +1,33 @@
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from ..admin import EstimatedCountPaginator
+from ..models import ChunkedUpload
+from . import TemporaryMediaMixin
+
+
+class SmallEstimatedCountPaginator(EstimatedCountPaginator):
+    min_estimate = 3
+
+
+class EstimatedCountPaginatorTest(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super(EstimatedCountPaginatorTest, self).setUp()
+        for i in range(5):
+            chunked_upload = ChunkedUpload(filename="%s.bin" % i, offset=4)
+            chunked_upload.file.save("file.bin", ContentFile(b"data"))
+
+    def get_count(self, queryset):
+        return SmallEstimatedCountPaginator(queryset.order_by("filename"), 2).count
+
+    def test_unfiltered(self):
+        self.assertEqual(self.get_count(ChunkedUpload.objects.all()), 5)
+
+    def test_filtered(self):
+        queryset = ChunkedUpload.objects.filter(filename__startswith="1")
+        self.assertEqual(self.get_count(queryset), 1)
+
+    def test_filtered_capped(self):
+        queryset = ChunkedUpload.objects.filter(status=ChunkedUpload.UPLOADING)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_count(queryset), 4)
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import unittest
+import zlib
+
+from django.test import SimpleTestCase
+
+from .. import checksums
+from . import TemporaryMediaMixin
+
+BLOCK_SIZE = 64 * 1024
+
+
+def tree_digest(data, checksum_type, block_size):
+    """
+    Reference implementation of the tree mode.
+    """
+    digests = b"".join(
+        hashlib.new(checksum_type, data[offset:offset + block_size]).digest()
+        for offset in range(0, len(data), block_size)
+    )
+    return hashlib.new(checksum_type, digests).hexdigest()
+
+
+class ChecksumsTest(TemporaryMediaMixin, SimpleTestCase):
+    def setUp(self):
+        super(ChecksumsTest, self).setUp()
+        # Not a multiple of the block size
+        self.data = os.urandom(5 * BLOCK_SIZE + 1234)
+        self.path = self.write_file("file.bin", self.data)
+
+    def test_linear(self):
+        for checksum_type in ("md5", "sha256"):
+            expected = hashlib.new(checksum_type, self.data).hexdigest()
+            self.assertEqual(checksums.hash_file(self.path, checksum_type), expected)
+            chunks = [self.data[:1000], self.data[1000:]]
+            self.assertEqual(checksums.hash_chunks(chunks, checksum_type), expected)
+
+    def test_tree(self):
+        expected = tree_digest(self.data, "sha256", BLOCK_SIZE)
+
+        for executor in checksums.EXECUTORS:
+            with self.subTest(executor=executor):
+                digest = checksums.hash_file(
+                    self.path,
+                    "sha256",
+                    mode=checksums.TREE,
+                    block_size=BLOCK_SIZE,
+                    workers=2,
+                    executor=executor,
+                )
+                self.assertEqual(digest, expected)
+
+    def test_tree_hash(self):
+        expected = tree_digest(self.data, "md5", BLOCK_SIZE)
+
+        # Updates that don't line up with the blocks
+        for size in (1000, BLOCK_SIZE, 3 * BLOCK_SIZE + 1):
+            with self.subTest(size=size):
+                h = checksums.TreeHash("md5", block_size=BLOCK_SIZE)
+                for offset in range(0, len(self.data), size):
+                    h.update(self.data[offset:offset + size])
+                self.assertEqual(h.hexdigest(), expected)
+
+    def test_single_block(self):
+        data = self.data[:1000]
+        path = self.write_file("small.bin", data)
+        for executor in checksums.EXECUTORS:
+            with self.subTest(executor=executor):
+                digest = checksums.hash_file(
+                    path,
+                    "md5",
+                    mode=checksums.TREE,
+                    block_size=BLOCK_SIZE,
+                    executor=executor,
+                )
+                self.assertEqual(digest, tree_digest(data, "md5", BLOCK_SIZE))
+
+    def test_empty_file(self):
+        path = self.write_file("empty.bin", b"")
+        self.assertEqual(checksums.hash_file(path, "md5"), hashlib.md5().hexdigest())
+        self.assertEqual(
+            checksums.hash_file(path, "md5", mode=checksums.TREE),
+            checksums.TreeHash("md5").hexdigest(),
+        )
+
+    def test_crc32(self):
+        self.assertEqual(
+            checksums.hash_file(self.path, "crc32"), "%08x" % zlib.crc32(self.data)
+        )
+
+    @unittest.skipIf(checksums.crc32c is None, "crc32c is not installed")
+    def test_crc32c(self):
+        self.assertEqual(checksums.hash_chunks([b"123456789"], "crc32c"), "e3069283")
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            checksums.hash_file(self.path, "md5", mode="invalid")
+        with self.assertRaises(ValueError):
+            checksums.hash_file(self.path, "md5", executor="invalid")
+        with self.assertRaises(ValueError):
+            checksums.new_hasher("md5", mode="invalid")
@@ -0,0 +1,136 @@
+import os
+from unittest import mock
+
+import requests
+from django.test import LiveServerTestCase, override_settings
+
+from ..client import ChunkedUploadClient
+from ..exceptions import ChunkedUploadError
+from ..models import ChunkedUpload
+from . import TemporaryMediaMixin
+from .urls import FlakyChunkedUploadView
+
+CHUNK_SIZE = 64 * 1024
+
+
+@override_settings(ROOT_URLCONF="drf_chunked_upload.tests.urls")
+class ClientTestCase(TemporaryMediaMixin, LiveServerTestCase):
+    url_path = "/uploads/"
+
+    def setUp(self):
+        super(ClientTestCase, self).setUp()
+        self.data = os.urandom(5 * CHUNK_SIZE + 123)
+        self.path = self.write_file("file.bin", self.data)
+
+    def get_client(self, **kwargs):
+        kwargs.setdefault("chunk_size", CHUNK_SIZE)
+        return ChunkedUploadClient(self.live_server_url + self.url_path, **kwargs)
+
+    def assertUploaded(self, upload, data):
+        chunked_upload = ChunkedUpload.objects.get(pk=upload["id"])
+        self.assertEqual(chunked_upload.status, ChunkedUpload.COMPLETE)
+        self.assertEqual(chunked_upload.offset, len(data))
+        with chunked_upload.file.open("rb") as f:
+            self.assertEqual(f.read(), data)
+
+
+class ChunkedUploadClientTest(ClientTestCase):
+    def test_upload(self):
+        upload = self.get_client().upload(self.path)
+        self.assertEqual(upload["filename"], "file.bin")
+        self.assertUploaded(upload, self.data)
+
+    def test_upload_single_chunk(self):
+        upload = self.get_client(chunk_size=len(self.data)).upload(self.path)
+        self.assertUploaded(upload, self.data)
+
+    @override_settings(
+        DRF_CHUNKED_UPLOAD_CHECKSUM="sha256",
+        DRF_CHUNKED_UPLOAD_CHECKSUM_MODE="tree",
+        DRF_CHUNKED_UPLOAD_CHECKSUM_BLOCK_SIZE=100000,
+    )
+    def test_upload_tree_checksum(self):
+        client = self.get_client(
+            checksum_type="sha256", checksum_mode="tree", checksum_block_size=100000
+        )
+        self.assertUploaded(client.upload(self.path), self.data)
+
+    def test_checksum_mismatch(self):
+        with self.assertRaises(ChunkedUploadError) as context:
+            self.get_client(checksum_type="sha1").upload(self.path)
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_resume_interrupted_upload(self):
+        client = self.get_client()
+        upload = client.put_chunk(
+            None, "file.bin", self.data[:CHUNK_SIZE], 0, len(self.data)
+        )
+
+        upload = client.upload(self.path, upload_url=upload["url"])
+        self.assertUploaded(upload, self.data)
+        self.assertEqual(ChunkedUpload.objects.count(), 1)
+
+    def test_upload_many(self):
+        files = [os.urandom(CHUNK_SIZE * i + 1) for i in range(1, 4)]
+        paths = [self.write_file("%s.bin" % i, data) for i, data in enumerate(files)]
+
+        uploads = self.get_client(max_workers=3).upload_many(paths)
+        for upload, data in zip(uploads, files):
+            self.assertUploaded(upload, data)
+
+
+@override_settings(DRF_CHUNKED_UPLOAD_NAMED_URL="flaky-detail")
+class ChunkedUploadClientFailureTest(ClientTestCase):
+    url_path = "/flaky/"
+
+    def setUp(self):
+        super(ChunkedUploadClientFailureTest, self).setUp()
+        FlakyChunkedUploadView.requests = 0
+        self.addCleanup(self.set_failures, ())
+
+    def set_failures(self, failures, store=True):
+        FlakyChunkedUploadView.failures = failures
+        FlakyChunkedUploadView.store = store
+
+    def test_resume_after_lost_response(self):
+        # The chunk is stored but the client doesn't know it
+        self.set_failures({2, 4})
+        upload = self.get_client().upload(self.path)
+        self.assertUploaded(upload, self.data)
+
+    def test_resume_after_failed_chunk(self):
+        self.set_failures({2, 3}, store=False)
+        upload = self.get_client().upload(self.path)
+        self.assertUploaded(upload, self.data)
+
+    def test_too_many_failures(self):
+        self.set_failures({2, 3}, store=False)
+        with self.assertRaises(ChunkedUploadError) as context:
+            self.get_client(max_retries=1).upload(self.path)
+        self.assertEqual(context.exception.status_code, 503)
+
+    def test_create_retried_after_connect_timeout(self):
+        # The connection was never established, so nothing was created
+        client = self.get_client()
+        session_request = client.session.request
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append(method)
+            if len(calls) == 1:
+                raise requests.ConnectTimeout()
+            return session_request(method, url, **kwargs)
+
+        with mock.patch.object(client.session, "request", side_effect=request):
+            upload = client.upload(self.path)
+
+        self.assertEqual(calls[:2], ["put", "put"])
+        self.assertUploaded(upload, self.data)
+        self.assertEqual(ChunkedUpload.objects.count(), 1)
+
+    def test_failed_create_is_not_retried(self):
+        # The upload may have been created, retrying would create another
+        self.set_failures({1})
+        with self.assertRaises(ChunkedUploadError):
+            self.get_client().upload(self.path)
+        self.assertEqual(ChunkedUpload.objects.count(), 1)
@@ -0,0 +1,66 @@
+import json
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ..models import ChunkedUpload
+from . import TemporaryMediaMixin
+
+
+def parse_events(response):
+    content = b"".join(response.streaming_content).decode("utf-8")
+    return [
+        json.loads(message.split("data: ", 1)[1])
+        for message in content.split("\n\n")
+        if message.startswith("event: ")
+    ]
+
+
+class EventsTestMixin(TemporaryMediaMixin):
+    def setUp(self):
+        super(EventsTestMixin, self).setUp()
+        self.chunked_upload = ChunkedUpload(filename="file.bin", offset=4)
+        self.chunked_upload.file.save("file.bin", ContentFile(b"data"))
+        self.url = "/uploads/%s/events/" % self.chunked_upload.pk
+
+
+@override_settings(ROOT_URLCONF="drf_chunked_upload.tests.urls")
+class ChunkedUploadEventsViewTest(EventsTestMixin, TestCase):
+    def test_completed(self):
+        self.chunked_upload.completed()
+        events = parse_events(self.client.get(self.url))
+        self.assertEqual([event["event"] for event in events], ["completed"])
+
+    def test_expired(self):
+        ChunkedUpload.objects.update(created_at=timezone.now() - timedelta(days=2))
+        events = parse_events(self.client.get(self.url))
+        self.assertEqual([event["event"] for event in events], ["expired"])
+
+    @override_settings(DRF_CHUNKED_UPLOAD_EVENTS_KEEPALIVE=60)
+    def test_expires_while_streaming(self):
+        expiration_delta = timezone.now() - self.chunked_upload.created_at
+        with override_settings(
+            DRF_CHUNKED_UPLOAD_EXPIRATION_DELTA=expiration_delta + timedelta(seconds=1)
+        ):
+            events = parse_events(self.client.get(self.url))
+
+        self.assertEqual([event["event"] for event in events], ["chunk", "expired"])
+        self.assertEqual(events[1]["offset"], 4)
+
+    def test_read_only(self):
+        for method in ("put", "post", "patch", "delete"):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(self.url)
+                self.assertEqual(response.status_code, 405)
+
+
+@override_settings(ROOT_URLCONF="drf_chunked_upload.tests.urls")
+class ChunkedUploadEventsConnectionTest(EventsTestMixin, TransactionTestCase):
+    def test_connection_closed(self):
+        response = self.client.get(self.url)
+        # Closed before streaming
+        self.assertIsNone(connection.connection)
+        response.close()
@@ -0,0 +1,57 @@
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from ..loadtest import APPEND, COMPLETE, CREATE, PHASES, RESUME, LoadTest, percentile
+from ..models import ChunkedUpload
+from . import TemporaryMediaMixin
+
+
+class PercentileTest(SimpleTestCase):
+    def test_empty(self):
+        self.assertIsNone(percentile([], 50))
+
+    def test_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(values, 20), 1)
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 99), 5)
+        self.assertEqual(percentile(values, 100), 5)
+
+
+@override_settings(ROOT_URLCONF="drf_chunked_upload.tests.urls")
+class LoadTestTest(TemporaryMediaMixin, LiveServerTestCase):
+    def test_run(self):
+        load_test = LoadTest(
+            self.live_server_url + "/uploads/",
+            uploads=4,
+            concurrency=2,
+            size=10000,
+            chunk_size=3000,
+            failure_rate=1,
+        )
+        load_test.run()
+        report = load_test.report()
+
+        self.assertEqual(report["uploads"], 4)
+        self.assertEqual(report["completed"], 4)
+        self.assertEqual(report["failed"], 0)
+        self.assertEqual(report["concurrency"], 2)
+        self.assertGreater(report["duration"], 0)
+        self.assertAlmostEqual(
+            report["bytes_per_second"], report["uploads_per_second"] * 10000
+        )
+
+        phases = report["phases"]
+        self.assertEqual(set(phases), set(PHASES))
+        for phase in PHASES:
+            self.assertEqual(phases[phase]["errors"], 0)
+        self.assertEqual(phases[CREATE]["requests"], 4)
+        self.assertEqual(phases[COMPLETE]["requests"], 4)
+        # 3 appends after the first chunk of each upload, all resumed
+        self.assertEqual(phases[APPEND]["requests"], 12)
+        self.assertEqual(phases[RESUME]["requests"], 12)
+        self.assertLessEqual(phases[CREATE]["p50"], phases[CREATE]["p99"])
+
+        uploads = ChunkedUpload.objects.filter(pk__in=load_test.upload_ids)
+        self.assertEqual(len(load_test.upload_ids), 4)
+        self.assertEqual(uploads.filter(status=ChunkedUpload.COMPLETE).count(), 4)
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, override_settings
+
+from ..events import InProcessEventBackend
+from ..settings import chunked_upload_settings, storage
+from . import TemporaryMediaMixin
+
+STORAGE_CLASS = "drf_chunked_upload.tests.test_settings.RecordingStorage"
+EVENTS_BACKEND = "drf_chunked_upload.tests.test_settings.SlowEventBackend"
+
+# Sets up Django with `RecordingStorage`, and prints how many were created
+# by then and after using the storage of the FileField
+SETUP_SCRIPT = """
+import django
+from django.conf import settings
+
+settings.configure(
+    INSTALLED_APPS=[
+        "django.contrib.auth",
+        "django.contrib.contenttypes",
+        "drf_chunked_upload",
+    ],
+    DRF_CHUNKED_UPLOAD_STORAGE_CLASS=%r,
+)
+django.setup()
+
+from drf_chunked_upload.models import ChunkedUpload
+from drf_chunked_upload.tests.test_settings import RecordingStorage
+
+created = RecordingStorage.instances
+ChunkedUpload._meta.get_field("file").storage.exists("file.part")
+print(created, RecordingStorage.instances)
+""" % STORAGE_CLASS
+
+
+class RecordingStorage(FileSystemStorage):
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        type(self).instances += 1
+        super(RecordingStorage, self).__init__(*args, **kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        return "recorded/" + name
+
+
+class ChunkedUploadStorageTest(TemporaryMediaMixin, SimpleTestCase):
+    def test_not_created_by_setup(self):
+        output = subprocess.check_output(
+            [sys.executable, "-c", SETUP_SCRIPT],
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+        self.assertEqual(output.split(), [b"0", b"1"])
+
+    def test_configured_storage(self):
+        with override_settings(DRF_CHUNKED_UPLOAD_STORAGE_CLASS=STORAGE_CLASS):
+            self.assertIsInstance(storage, RecordingStorage)
+            self.assertIs(storage._wrapped, chunked_upload_settings.STORAGE)
+            # Methods implemented by `Storage` use the configured storage
+            name = storage.save("file.part", ContentFile(b"data"))
+            self.assertEqual(name, "recorded/file.part")
+            self.assertTrue(storage.exists(name))
+
+        self.assertNotIsInstance(storage, RecordingStorage)
+
+
+class SlowEventBackend(InProcessEventBackend):
+    # Leaves time for other threads to read the setting
+    def __init__(self, *args, **kwargs):
+        time.sleep(0.05)
+        super(SlowEventBackend, self).__init__(*args, **kwargs)
+
+
+@override_settings(DRF_CHUNKED_UPLOAD_EVENTS_BACKEND=EVENTS_BACKEND)
+class ChunkedUploadEventsBackendTest(SimpleTestCase):
+    def test_created_once(self):
+        barrier = threading.Barrier(8)
+        backends = []
+
+        def get_backend():
+            barrier.wait()
+            backends.append(chunked_upload_settings.EVENTS_BACKEND)
+
+        threads = [threading.Thread(target=get_backend) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(backends), 8)
+        self.assertIsInstance(backends[0], SlowEventBackend)
+        self.assertEqual({id(backend) for backend in backends}, {id(backends[0])})
+
+    def test_kept_on_other_settings(self):
+        backend = chunked_upload_settings.EVENTS_BACKEND
+        with override_settings(DRF_CHUNKED_UPLOAD_EVENTS_KEEPALIVE=1):
+            self.assertEqual(chunked_upload_settings.EVENTS_KEEPALIVE, 1)
+            self.assertIs(chunked_upload_settings.EVENTS_BACKEND, backend)
+        self.assertIs(chunked_upload_settings.EVENTS_BACKEND, backend)
+
+    def test_recreated_on_backend_settings(self):
+        backend = chunked_upload_settings.EVENTS_BACKEND
+        with override_settings(DRF_CHUNKED_UPLOAD_EVENTS_BACKEND_OPTIONS={}):
+            self.assertIsNot(chunked_upload_settings.EVENTS_BACKEND, backend)
@@ -0,0 +1,75 @@
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from ..models import ChunkedUpload, ChunkedUploadStatistics
+from . import TemporaryMediaMixin
+
+
+class ChunkedUploadStatisticsTest(TemporaryMediaMixin, TestCase):
+    def create_upload(self, data=b"data"):
+        chunked_upload = ChunkedUpload(filename="file.bin", offset=len(data))
+        with self.captureOnCommitCallbacks(execute=True):
+            chunked_upload.file.save("file.bin", ContentFile(data))
+        return chunked_upload
+
+    def assertSummary(self, **expected):
+        summary = ChunkedUploadStatistics.objects.summary()
+        self.assertEqual({name: summary[name] for name in expected}, expected)
+
+    def test_upload(self):
+        chunked_upload = self.create_upload(b"data")
+        self.assertSummary(
+            uploads_created=1, chunks_received=1, active_uploads=1, bytes_in_progress=4
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chunked_upload.append_chunk(ContentFile(b"more"), chunk_size=4)
+        self.assertSummary(chunks_received=2, bytes_received=8, bytes_in_progress=8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chunked_upload.completed()
+        self.assertSummary(uploads_completed=1, active_uploads=0, bytes_in_progress=0)
+
+    def test_chunk_recorded_on_save(self):
+        chunked_upload = self.create_upload(b"data")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chunked_upload.append_chunk(ContentFile(b"more"), save=False)
+        self.assertSummary(chunks_received=1, bytes_received=4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chunked_upload.save()
+        self.assertSummary(chunks_received=2, bytes_received=8)
+
+    def test_rolled_back(self):
+        chunked_upload = self.create_upload(b"data")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    chunked_upload.append_chunk(ContentFile(b"more"), chunk_size=4)
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertSummary(chunks_received=1, bytes_received=4)
+
+    def test_queryset_delete(self):
+        for i in range(3):
+            self.create_upload()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ChunkedUpload.objects.all().delete()
+        self.assertSummary(uploads_deleted=3, active_uploads=0, bytes_in_progress=0)
+
+    @override_settings(DRF_CHUNKED_UPLOAD_STATISTICS_BUCKETS=4)
+    def test_buckets(self):
+        for i in range(20):
+            self.create_upload()
+
+        self.assertSummary(uploads_created=20, active_uploads=20)
+        periods = list(ChunkedUploadStatistics.objects.by_period())
+        self.assertEqual(sum(period["uploads_created"] for period in periods), 20)
+        self.assertLessEqual(
+            ChunkedUploadStatistics.objects.count(), 4 * len(periods)
+        )
@@ -0,0 +1,56 @@
+from django.urls import path
+
+from rest_framework import status
+
+from ..exceptions import ChunkedUploadError
+from ..views import ChunkedUploadEventsView, ChunkedUploadView
+
+
+class TestChunkedUploadView(ChunkedUploadView):
+    authentication_classes = ()
+    permission_classes = ()
+
+
+class TestChunkedUploadEventsView(ChunkedUploadEventsView):
+    authentication_classes = ()
+    permission_classes = ()
+
+
+class FlakyChunkedUploadView(TestChunkedUploadView):
+    """
+    Fails the PUT requests numbered (from 1) in `failures`, after the chunk
+    was stored if `store` is true, so that the response is lost.
+    """
+
+    failures = ()
+    store = True
+    requests = 0
+
+    def _put(self, request, pk=None, *args, **kwargs):
+        cls = type(self)
+        cls.requests += 1
+        if cls.requests not in cls.failures:
+            return super(FlakyChunkedUploadView, self)._put(
+                request, pk=pk, *args, **kwargs
+            )
+
+        if cls.store:
+            self._put_chunk(request, upload_id=pk, *args, **kwargs)
+        raise ChunkedUploadError(
+            status=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Injected failure"
+        )
+
+
+urlpatterns = [
+    path("uploads/", TestChunkedUploadView.as_view(), name="chunkedupload-list"),
+    path(
+        "uploads/<uuid:pk>/",
+        TestChunkedUploadView.as_view(),
+        name="chunkedupload-detail",
+    ),
+    path("uploads/<uuid:pk>/events/", TestChunkedUploadEventsView.as_view()),
+    path("flaky/", FlakyChunkedUploadView.as_view(), name="flaky-list"),
+    path(
+        "flaky/<uuid:pk>/", FlakyChunkedUploadView.as_view(), name="flaky-detail"
+    ),
+]
@@ -1,16 +1,24 @@
+import json
 import re
 
+from django.db import connections
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from . import events
 from .exceptions import ChunkedUploadError
-from .models import ChunkedUpload
+from .models import ChunkedUpload, ChunkedUploadStatistics
 from .serializers import ChunkedUploadSerializer
-from .settings import CHECKSUM_TYPE, MAX_BYTES, USER_RESTRICTED
+from .settings import chunked_upload_settings
 
 
 class ChunkedUploadBaseView(GenericAPIView):
@@ -32,7 +40,7 @@ class ChunkedUploadBaseView(GenericAPIView):
         By default, user can only continue uploading his/her own uploads.
         """
         queryset = self.model.objects.all()
-        if USER_RESTRICTED:
+        if chunked_upload_settings.USER_RESTRICTED:
             if self.request.user.is_authenticated:
                 queryset = queryset.filter(user=self.request.user)
         return queryset
@@ -97,7 +105,15 @@ class ChunkedUploadView(ListModelMixin, RetrieveModelMixin, ChunkedUploadBaseVie
     content_range_pattern = re.compile(
         r"^bytes (?P<start>\d+)-(?P<end>\d+)/(?P<total>\d+)$"
     )
-    max_bytes = MAX_BYTES  # Max amount of data that can be uploaded
+
+    @property
+    def max_bytes(self):
+        """
+        Max amount of data that can be uploaded. Defaults to the
+        `DRF_CHUNKED_UPLOAD_MAX_BYTES` setting, subclasses may set it as a
+        class attribute.
+        """
+        return chunked_upload_settings.MAX_BYTES
 
     def on_completion(self, chunked_upload, request):
         """
@@ -194,6 +210,14 @@ class ChunkedUploadView(ListModelMixin, RetrieveModelMixin, ChunkedUploadBaseVie
             # Append the the chunk to the upload
             chunked_upload.append_chunk(chunk, chunk_size=chunk_size)
         else:
+            # A new upload has no data yet, so its first chunk must start at 0
+            if start != 0:
+                raise ChunkedUploadError(
+                    status=status.HTTP_400_BAD_REQUEST,
+                    detail="Offsets do not match",
+                    offset=0,
+                )
+
             user = request.user if request.user.is_authenticated else None
 
             serializer = self.serializer_class(data=request.data)
@@ -240,12 +264,13 @@ class ChunkedUploadView(ListModelMixin, RetrieveModelMixin, ChunkedUploadBaseVie
             chunked_upload = self._put_chunk(request, whole=True, *args, **kwargs)
             upload_id = chunked_upload.id
 
-        checksum = request.data.get(CHECKSUM_TYPE)
+        checksum_type = chunked_upload_settings.CHECKSUM_TYPE
+        checksum = request.data.get(checksum_type)
 
         error_msg = None
         if self.do_checksum_check:
             if not upload_id or not checksum:
-                error_msg = ("Both 'id' and '{}' are " "required").format(CHECKSUM_TYPE)
+                error_msg = ("Both 'id' and '{}' are " "required").format(checksum_type)
         elif not upload_id:
             error_msg = "'id' is required"
         if error_msg:
@@ -279,3 +304,154 @@ class ChunkedUploadView(ListModelMixin, RetrieveModelMixin, ChunkedUploadBaseVie
             return self.retrieve(request, pk=pk, *args, **kwargs)
         else:
             return self.list(request, *args, **kwargs)
+
+
+class ChunkedUploadStatisticsView(APIView):
+    """
+    Current state of uploads: active uploads, bytes in progress, throughput,
+    completion rate and uploads expiring soon. Read from
+    `ChunkedUploadStatistics`, so it never scans the uploads table.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(ChunkedUploadStatistics.objects.summary())
+
+
+def format_event(event):
+    """
+    Format an event as a Server-Sent Events message.
+    """
+    return "event: %s\ndata: %s\n\n" % (event["event"], json.dumps(event))
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renders error responses of `ChunkedUploadEventsView` for clients that
+    only accept `text/event-stream`.
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event(dict(data, event="error")).encode("utf-8")
+
+
+class ChunkedUploadEventsView(ChunkedUploadBaseView):
+    """
+    Streams upload events as Server-Sent Events, published by the events
+    backend as uploads receive chunks, complete or expire, so progress can
+    be followed without polling the database.
+
+    GET with upload ID to follow an upload, until it completes or expires
+    (when it expires, not when `delete_expired_uploads` deletes it).
+
+    GET without upload ID to follow all the uploads of the logged user.
+
+    Each stream holds a worker while it is open, serve it from workers that
+    can handle many long-lived connections.
+    """
+
+    renderer_classes = (JSONRenderer, EventStreamRenderer)
+    http_method_names = ["get", "head", "options"]
+
+    def get_events_backend(self):
+        backend = chunked_upload_settings.EVENTS_BACKEND
+        if backend is None:
+            raise ChunkedUploadError(
+                status=status.HTTP_404_NOT_FOUND, detail="Events are disabled"
+            )
+        return backend
+
+    def _get(self, request, pk=None, *args, **kwargs):
+        backend = self.get_events_backend()
+
+        if pk:
+            # Subscribe before reading the current state, so no event is lost
+            subscription = backend.subscribe(events.upload_channel(pk))
+            try:
+                chunked_upload = get_object_or_404(self.get_queryset(), pk=pk)
+            except Exception:
+                subscription.close()
+                raise
+
+            event = chunked_upload.CHUNK
+            if chunked_upload.status == chunked_upload.COMPLETE:
+                event = chunked_upload.COMPLETED
+            elif chunked_upload.expired:
+                event = chunked_upload.EXPIRED
+            initial = [chunked_upload.get_event_data(event)]
+            final_events = chunked_upload.FINAL_EVENTS
+            expires_at = chunked_upload.expires_at
+        else:
+            if not request.user.is_authenticated:
+                raise ChunkedUploadError(
+                    status=status.HTTP_403_FORBIDDEN,
+                    detail="Authentication is required to follow your uploads",
+                )
+            subscription = backend.subscribe(events.user_channel(request.user.pk))
+            initial = []
+            final_events = ()
+            expires_at = None
+
+        self.close_connections()
+
+        response = StreamingHttpResponse(
+            self.stream(subscription, initial, final_events, expires_at),
+            content_type=EventStreamRenderer.media_type,
+        )
+        response["Cache-Control"] = "no-cache"
+        # Don't let nginx buffer the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def close_connections(self):
+        """
+        Close the database connections before streaming, which doesn't use
+        them, so that open streams don't hold connections until they end.
+        """
+        for connection in connections.all():
+            if not connection.in_atomic_block:
+                connection.close()
+
+    def stream(self, subscription, initial, final_events, expires_at=None):
+        """
+        Yield the `initial` events, then the events of `subscription` until
+        one of `final_events`, or until the upload expires at `expires_at`.
+        """
+        keepalive = chunked_upload_settings.EVENTS_KEEPALIVE
+        last = None
+        try:
+            for event in initial:
+                yield format_event(event)
+                if event["event"] in final_events:
+                    return
+                last = event
+
+            while True:
+                timeout = keepalive
+                if expires_at is not None:
+                    remaining = (expires_at - timezone.now()).total_seconds()
+                    if remaining <= 0:
+                        # The expired event is only published when the
+                        # upload is deleted, which may happen much later
+                        yield format_event(dict(last, event=self.model.EXPIRED))
+                        return
+                    timeout = min(timeout, remaining)
+
+                event = subscription.get(timeout=timeout)
+                if event is None:
+                    if timeout == keepalive:
+                        # Comment line, lets proxies and the server notice
+                        # closed connections
+                        yield ": keepalive\n\n"
+                    continue
+
+                yield format_event(event)
+                if event["event"] in final_events:
+                    return
+                last = event
+        finally:
+            subscription.close()
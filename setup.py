@@ -19,6 +19,7 @@ download_url = (
 setup(
     name='drf-chunked-upload',
     packages=['drf_chunked_upload'],
+    include_package_data=True,
     version=version,
     description=('Upload large files to Django REST Framework in multiple chunks,' +
                  ' with the ability to resume if the upload is interrupted.'),
@@ -28,5 +29,9 @@ setup(
     url='https://github.com/jkeifer/drf-chunked-upload',
     download_url=download_url % version,
     install_requires=[],
+    extras_require={
+        'client': ['requests'],
+        'crc32c': ['crc32c'],
+    },
     license='MIT-Zero'
 )